@@ -1,4 +1,9 @@
+import contextlib
+import random
+import signal
+import threading
 import time
+from urllib.parse import urlparse
 
 import requests
 import click
@@ -14,6 +19,10 @@ RESULT_COLORS = {
     'FAILURE': 'red',
 }
 
+# Minimum number of polled builds for which the builds of all jobs are
+# fetched in a single request
+BUILDS_SNAPSHOT_MIN_JOBS = 10
+
 
 @click.command()
 @click.option('--block/--no-block', default=False, help='Block until builds '
@@ -38,11 +47,17 @@ def do_build(session, jobs_names, base_dir, block, build_parameters):
                                 build_parameters)
     exit_code = 0
     if block:
-        results = wait_for_builds(session, queue_urls)
+        with stop_on_interrupt() as stop_event:
+            results = wait_for_builds(session, queue_urls, stop_event)
+        unfinished_jobs = get_unfinished_jobs(queue_urls, results,
+                                              stop_event)
+        utils.print_jobs_list('Stopped waiting for:', unfinished_jobs,
+                              pad_lines=0, fg='yellow')
         for job_name, (build_url, result, runs_urls) in results.items():
             print_build_result(session, base_dir, job_name, build_url, result,
                                runs_urls)
-        if any(r[1] != 'SUCCESS' for r in results.values()):
+        if unfinished_jobs or \
+                any(r[1] != 'SUCCESS' for r in results.values()):
             exit_code = 1
     return exit_code
 
@@ -54,17 +69,20 @@ def trigger_builds(session, jobs_names, base_dir, parameters):
     Return a *queue_urls*, which can be passed to :func:`wait_for_builds` to
     wait for jobs completion.
     """
-    queue_urls = {}
-    for name in jobs_names:
-        queue_url = jenkins_api.build_job(session, name, parameters)
-        queue_urls[name] = queue_url
-    return queue_urls
+    return utils.map_jobs(
+        lambda name: jenkins_api.build_job(session, name, parameters),
+        jobs_names
+    )
 
 
-def wait_for_builds(session, queue_urls):
+def wait_for_builds(session, queue_urls, stop_event=None):
     """
     Wait until builds corresponding to *queue_urls* are done.
 
+    If *stop_event* is given, it should be a :class:`threading.Event`; when it
+    is set, stop waiting and only return the results of the builds that are
+    done.
+
     Return a dict indexed by job names, containing ``(build_url, result,
     runs_urls)`` tuples.
 
@@ -74,8 +92,51 @@ def wait_for_builds(session, queue_urls):
     *runs_urls* is a (possibly empty) list of sub runs URLs for multi
     configuration projects.
     """
-    builds_urls = _get_builds_urls(session, queue_urls)
-    return _poll_builds(session, builds_urls)
+    builds_urls = _get_builds_urls(session, queue_urls, stop_event)
+    if stop_event is not None and stop_event.is_set():
+        return {}
+    return _poll_builds(session, builds_urls, stop_event)
+
+
+def get_unfinished_jobs(queue_urls, results, stop_event):
+    """
+    Return the sorted list of jobs of *queue_urls* missing from the *results*
+    of :func:`wait_for_builds`, if it was stopped by *stop_event*.
+
+    If *stop_event* is not set, return an empty list: jobs can also be missing
+    from *results* because their queue item disappeared.
+    """
+    if not stop_event.is_set():
+        return []
+    return sorted(set(queue_urls).difference(results))
+
+
+@contextlib.contextmanager
+def stop_on_interrupt():
+    """
+    A context manager yielding a :class:`threading.Event`, which is set when
+    the first SIGINT (e.g. Ctrl-C) is received in its block. Next SIGINTs
+    raise :class:`KeyboardInterrupt` as usual.
+
+    The event is never set if not used in the main thread.
+    """
+    stop_event = threading.Event()
+
+    def handler(signum, frame):
+        if stop_event.is_set():
+            raise KeyboardInterrupt()
+        stop_event.set()
+
+    try:
+        prev_handler = signal.signal(signal.SIGINT, handler)
+    except ValueError:
+        # Signal handlers can only be set in the main thread
+        yield stop_event
+        return
+    try:
+        yield stop_event
+    finally:
+        signal.signal(signal.SIGINT, prev_handler)
 
 
 def print_build_result(session, base_dir, job_name, build_url, result=None,
@@ -104,9 +165,11 @@ def print_build_result(session, base_dir, job_name, build_url, result=None,
     if not only_log_failures or result != 'SUCCESS':
         if not runs_urls:
             log = jenkins_api.get_build_log(session, build_url)
-            _print_marker('Beginning of "%s" logs' % job_name)
-            print(log.rstrip())
-            _print_marker('End of "%s" logs' % job_name)
+            print('\n'.join([
+                _format_marker('Beginning of "%s" logs' % job_name),
+                log.rstrip(),
+                _format_marker('End of "%s" logs' % job_name),
+            ]))
         for run_url in runs_urls:
             run_info = jenkins_api.get_object(session, run_url)
             print_build_result(session,
@@ -119,56 +182,199 @@ def print_build_result(session, base_dir, job_name, build_url, result=None,
                                only_log_failures=only_log_failures)
 
 
-def _print_marker(text, marker='-', width=79):
-    print(marker * width)
-    print(text.center(width))
-    print(marker * width)
+def _format_marker(text, marker='-', width=79):
+    return '\n'.join([marker * width, text.center(width), marker * width])
 
 
-def _get_builds_urls(session, queue_urls):
+def _get_builds_urls(session, queue_urls, stop_event=None):
     ret = {}
-    queue_urls = queue_urls.copy()
-    while True:
-        for job_name, queue_url in list(queue_urls.items()):
-            try:
-                queue_infos = jenkins_api.get_object(session, queue_url)
-            except requests.HTTPError as exc:
-                if exc.response.status_code == 404:
-                    # A 404 means that the queue info is not available anymore.
-                    # We don't have any way to tell if the job was executed or
-                    # not in this case, so just ignore it.
-                    utils.sechowrap('%s: unknown status' % job_name,
-                                    fg='yellow')
-                    del queue_urls[job_name]
-                else:
-                    raise
+    poller = Poller(queue_urls, stop_event=stop_event)
+    while poller:
+        queues_infos = _get_queues_infos(session, queue_urls, poller)
+        for job_name, queue_infos in queues_infos.items():
+            if queue_infos is None:
+                # A 404 means that the queue info is not available anymore.
+                # We don't have any way to tell if the job was executed or
+                # not in this case, so just ignore it.
+                utils.sechowrap('%s: unknown status' % job_name, fg='yellow')
+                poller.remove(job_name)
+            elif 'executable' in queue_infos:
+                ret[job_name] = queue_infos['executable']['url']
+                poller.remove(job_name)
             else:
-                if 'executable' in queue_infos:
-                    ret[job_name] = queue_infos['executable']['url']
-                    del queue_urls[job_name]
-        if not queue_urls:
+                poller.reschedule(job_name, _get_queue_state(queue_infos))
+        if not poller.wait():
             break
-        time.sleep(1)
     return ret
 
 
-def _poll_builds(session, builds_urls):
+def _get_queue_state(queue_infos):
+    """
+    Get a value that changes only when the queue item described by
+    *queue_infos* moves between queue stages.
+
+    The "why" text can't be used for that, as Jenkins updates it on each poll
+    during the quiet period ("In the quiet period. Expires in 4.9 sec").
+    """
+    return tuple(queue_infos.get(k)
+                 for k in ('_class', 'blocked', 'buildable', 'stuck'))
+
+
+def _get_queues_infos(session, queue_urls, poller):
+    """
+    Get the queue infos of the jobs due in *poller*.
+
+    When polling multiple jobs, the items still waiting in the queue are
+    retrieved with a single request (which also refreshes the jobs that are
+    not due yet), and only the other due items are requested one by one.
+    """
     ret = {}
-    builds_urls = builds_urls.copy()
-    while True:
-        for job_name, build_url in list(builds_urls.items()):
-            build_infos = jenkins_api.get_object(session, build_url)
+    if len(poller) > 1:
+        waiting_items = jenkins_api.get_queue_snapshot(session)
+        for job_name in poller.get_jobs():
+            item_id = jenkins_api.get_queue_item_id(queue_urls[job_name])
+            if item_id in waiting_items:
+                ret[job_name] = waiting_items[item_id]
+    ret.update(utils.map_jobs(
+        lambda name: _get_queue_infos(session, queue_urls[name]),
+        [n for n in poller.get_due_jobs() if n not in ret]
+    ))
+    return ret
+
+
+def _get_queue_infos(session, queue_url):
+    """
+    Get the infos of the queue item at *queue_url*, or None if it is not
+    available anymore.
+    """
+    try:
+        return jenkins_api.get_object(session, queue_url)
+    except requests.HTTPError as exc:
+        if exc.response.status_code == 404:
+            return None
+        raise
+
+
+def _poll_builds(session, builds_urls, stop_event=None):
+    ret = {}
+    poller = Poller(builds_urls, stop_event=stop_event)
+    while poller:
+        builds_infos = _get_builds_infos(session, builds_urls, poller)
+        for job_name, build_infos in builds_infos.items():
             result = build_infos['result']
             if result is not None:
                 runs_urls = _get_runs_urls(build_infos)
-                ret[job_name] = (build_url, result, runs_urls)
-                del builds_urls[job_name]
-        if not builds_urls:
+                ret[job_name] = (builds_urls[job_name], result, runs_urls)
+                poller.remove(job_name)
+            else:
+                poller.reschedule(job_name, build_infos.get('building'))
+        if not poller.wait():
             break
-        time.sleep(1)
     return ret
 
 
+def _get_builds_infos(session, builds_urls, poller):
+    """
+    Get the build infos of the jobs due in *poller*.
+
+    When polling at least :data:`BUILDS_SNAPSHOT_MIN_JOBS` jobs, the recent
+    builds of all the server jobs are retrieved with a single request (which
+    also refreshes the jobs that are not due yet), and only the due builds not
+    found there are requested one by one. Below that, the snapshot would cost
+    more than the requests it saves.
+    """
+    ret = {}
+    if len(poller) >= BUILDS_SNAPSHOT_MIN_JOBS:
+        builds = jenkins_api.get_builds_snapshot(session)
+        for job_name in poller.get_jobs():
+            build_path = urlparse(builds_urls[job_name]).path
+            if build_path in builds:
+                ret[job_name] = builds[build_path]
+    ret.update(utils.map_jobs(
+        lambda name: jenkins_api.get_object(session, builds_urls[name]),
+        [n for n in poller.get_due_jobs() if n not in ret]
+    ))
+    return ret
+
+
+class Poller(object):
+    """
+    Schedule the polling of the state of a set of jobs, with an exponential
+    backoff.
+
+    Jobs are first polled immediately, and then after an interval starting at
+    *min_interval*. The interval of a job is multiplied by *factor* each time
+    its state is polled unchanged, up to *max_interval*, and reset to
+    *min_interval* when its state changes. Intervals are randomly spread by
+    +/- *jitter* (a fraction of the interval).
+
+    Waits are interrupted when the :class:`threading.Event` *stop_event* is
+    set, see :meth:`wait`.
+    """
+
+    def __init__(self, jobs_names, min_interval=0.1, max_interval=5.0,
+                 factor=1.5, jitter=0.1, stop_event=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+        self.stop_event = stop_event
+        now = time.time()
+        self.schedule = {name: (now, min_interval) for name in jobs_names}
+        self.states = {}
+
+    def __len__(self):
+        return len(self.schedule)
+
+    def get_jobs(self):
+        """
+        Return the list of jobs still being polled.
+        """
+        return list(self.schedule)
+
+    def get_due_jobs(self):
+        """
+        Return the list of jobs that should be polled now.
+        """
+        now = time.time()
+        return [n for n, (d, _) in self.schedule.items() if d <= now]
+
+    def reschedule(self, job_name, state):
+        """
+        Schedule the next poll of *job_name*, whose *state* was just polled.
+        """
+        _, interval = self.schedule[job_name]
+        if job_name in self.states and self.states[job_name] != state:
+            interval = self.min_interval
+        self.states[job_name] = state
+        spread = 1 + random.uniform(-self.jitter, self.jitter)
+        deadline = time.time() + interval * spread
+        interval = min(interval * self.factor, self.max_interval)
+        self.schedule[job_name] = (deadline, interval)
+
+    def remove(self, job_name):
+        """
+        Stop polling *job_name*.
+        """
+        del self.schedule[job_name]
+        self.states.pop(job_name, None)
+
+    def wait(self):
+        """
+        Sleep until the next job should be polled.
+
+        Return False if polling should stop because *stop_event* was set, or
+        else True.
+        """
+        if self.schedule:
+            next_deadline = min(d for d, _ in self.schedule.values())
+            delay = max(next_deadline - time.time(), 0)
+            if self.stop_event is not None:
+                return not self.stop_event.wait(delay)
+            time.sleep(delay)
+        return True
+
+
 def _get_runs_urls(build_infos):
     if 'runs' in build_infos:
         return [r['url'] for r in build_infos['runs']]
@@ -68,10 +68,10 @@ def jobs_command(num_jobs=-1, dirty_flag=False, allow_unknown=False,
                 jobs_defs = repository.get_jobs_defs(base_dir)
                 if not jobs_names:
                     if default_to_all:
-                        jobs_names = jobs_defs.keys()
+                        jobs_names = tuple(jobs_defs)
                     else:
-                        jobs_names = []
-                unknown_jobs = set(jobs_names).difference(jobs_defs)
+                        jobs_names = ()
+                unknown_jobs = [n for n in jobs_names if n not in jobs_defs]
                 if unknown_jobs:
                     click.secho('Job(s) not found in repository: %s' %
                                 ', '.join(unknown_jobs), fg='red', bold=True)
@@ -52,18 +52,20 @@ def diff(context, jobs_names, base_dir, context_overrides, reverse,
                     fg='yellow', bold=True)
         click.secho('  $ pip install lxml', fg='green')
     session = jenkins_api.auth(base_dir)
+    diffs = utils.iter_jobs(
+        lambda name: _get_job_diff_or_none(session, base_dir, name,
+                                           context_overrides, reverse),
+        jobs_names
+    )
     ret_code = 0
-    for job_name in jobs_names:
-        try:
-            ret_code |= print_job_diff(session, base_dir, job_name,
-                                       context_overrides, reverse=reverse,
-                                       names_only=names_only)
-        except exceptions.JobNotFound:
+    for job_name, diff in diffs:
+        if diff is None:
             utils.sechowrap('')
             utils.sechowrap('Unknown job: %s' % job_name, fg='red', bold=True)
             utils.sechowrap('Job is present in the local repository, but not '
                             'on the Jenkins server.', fg='red')
             context.exit(2)
+        ret_code |= _print_job_diff(job_name, diff, names_only=names_only)
     ret_code = 3 if ret_code != 0 else 0
     context.exit(ret_code)
 
@@ -84,6 +86,10 @@ def print_job_diff(session, base_dir, job_name, context_overrides=None,
     """
     diff = get_job_diff(session, base_dir, job_name,
                         context_overrides=context_overrides, reverse=reverse)
+    return _print_job_diff(job_name, diff, names_only=names_only)
+
+
+def _print_job_diff(job_name, diff, names_only=False):
     if names_only:
         if diff:
             print(job_name)
@@ -92,6 +98,16 @@ def print_job_diff(session, base_dir, job_name, context_overrides=None,
     return len(diff)
 
 
+def _get_job_diff_or_none(session, base_dir, job_name, context_overrides,
+                          reverse):
+    try:
+        return get_job_diff(session, base_dir, job_name,
+                            context_overrides=context_overrides,
+                            reverse=reverse)
+    except exceptions.JobNotFound:
+        return None
+
+
 def get_job_diff(session, base_dir, job_name, context_overrides=None,
                  reverse=False):
     """
@@ -100,13 +116,17 @@ def get_job_diff(session, base_dir, job_name, context_overrides=None,
     logger.debug('diffing %s', job_name)
     if context_overrides is None:
         context_overrides = {}
+    remove_disabled_flag = conf.get(base_dir,
+                                    ['server', 'disable_jobs_from_gui'])
     local_xml, _ = repository.get_job_conf(base_dir, job_name,
                                            context_overrides)
     with utils.add_lxml_syntax_error_context(local_xml, job_name):
-        local_xml = _prepare_xml(base_dir, local_xml)
+        local_xml = _prepare_xml(local_xml, remove_disabled_flag)
     remote_xml = jenkins_api.get_job_config(session, job_name)
     with utils.add_lxml_syntax_error_context(remote_xml, job_name):
-        remote_xml = _prepare_xml(base_dir, remote_xml)
+        remote_xml = _prepare_xml(remote_xml, remove_disabled_flag)
+    if local_xml == remote_xml:
+        return []
     from_text = remote_xml
     to_text = local_xml
     from_file = 'remote/%s.xml' % job_name
@@ -119,24 +139,31 @@ def get_job_diff(session, base_dir, job_name, context_overrides=None,
     return list(diff)
 
 
-def _prepare_xml(base_dir, xml):
+def _prepare_xml(xml, remove_disabled_flag):
     xml = utils.clean_xml(xml)
-    xml = utils.unescape_xml(xml)
+    # Parsing and rendering back with ElementTree also unescapes the XML
+    tree = utils.parse_xml(xml)
+    jobs.extract_hash_from_tree(tree)
+    if remove_disabled_flag:
+        jobs.remove_disabled_flag_from_tree(tree)
+    xml = utils.render_xml(tree)
     xml = xml.replace('\r\n', '\n')
-    _, xml = jobs.extract_hash_from_description(xml)
-    if conf.get(base_dir, ['server', 'disable_jobs_from_gui']):
-        xml = jobs.remove_disabled_flag(xml)
     return xml.splitlines(True)
 
 
 def _print_diff(diff):
+    # Output is written all at once, as one write per line is slow on large
+    # diffs
+    lines = []
     for line in diff:
         line = line.rstrip()
         if line.startswith('---') or line.startswith('+++'):
-            click.secho(line, fg='white', bold=True)
+            line = click.style(line, fg='white', bold=True)
         elif line.startswith('-'):
-            click.secho(line, fg='red')
+            line = click.style(line, fg='red')
         elif line.startswith('+'):
-            click.secho(line, fg='green')
-        else:
-            click.secho(line)
+            line = click.style(line, fg='green')
+        lines.append(line)
+        lines.append('\n')
+    if lines:
+        click.echo(''.join(lines), nl=False)
@@ -1,3 +1,5 @@
+from concurrent import futures
+
 import click
 
 from . import decorators
@@ -11,6 +13,12 @@ from .. import utils
 from .. import exceptions
 
 
+# Number of threads pushing jobs to the server
+PUSH_WORKERS = 8
+# Maximum number of rendered jobs waiting to be pushed
+MAX_PENDING_PUSHES = 2 * PUSH_WORKERS
+
+
 @click.command()
 @click.option('--force/--no-force', default=False, help='Allow pushing, even '
               'if pushes are disabled in the configuration.')
@@ -22,6 +30,8 @@ from .. import exceptions
               help='Block until builds are done and show their outcome.')
 @click.option('--confirm-replace/--no-confirm-replace', default=True,
               help='Confirm before replacing jobs of different types.')
+@click.option('--skip-unchanged/--no-skip-unchanged', default=True,
+              help='Skip jobs that are already up to date on the server.')
 @decorators.repos_command
 @decorators.jobs_command(dirty_flag=True)
 @decorators.context_command
@@ -30,7 +40,7 @@ from .. import exceptions
 @click.pass_context
 def push(context, jobs_names, base_dir, force, allow_overwrite,
          context_overrides, trigger_builds, block_builds, build_parameters,
-         confirm_replace):
+         confirm_replace, skip_unchanged):
     """
     Push JOBS to the Jenkins server.
 
@@ -40,15 +50,30 @@ def push(context, jobs_names, base_dir, force, allow_overwrite,
     _check_push_flag(context, base_dir, force)
     jobs_defs = repository.get_jobs_defs(base_dir)
     pipelines = repository.get_pipelines(base_dir)
-    _check_for_gui_modifications(context, session, base_dir, jobs_names,
-                                 allow_overwrite, context_overrides)
+    if skip_unchanged or not allow_overwrite:
+        servers_hashes = utils.map_jobs(
+            lambda name: _get_server_hashes(session, name),
+            jobs_names
+        )
+    else:
+        servers_hashes = {}
+    if not allow_overwrite:
+        _check_for_gui_modifications(context, session, base_dir, jobs_names,
+                                     servers_hashes, context_overrides)
+    if skip_unchanged:
+        pushed_hashes = {n: h[0] for n, h in servers_hashes.items()
+                         if h is not None and h[0] == h[1]}
+    else:
+        pushed_hashes = {}
     remaining_jobs = list(jobs_names)
+    unchanged_jobs = []
     while remaining_jobs:
         with click.progressbar(remaining_jobs, label='Pushing jobs') as bar:
-            mismatch_info, remaining_jobs = _push_jobs(session, remaining_jobs,
-                                                       bar, base_dir,
-                                                       pipelines, jobs_defs,
-                                                       context_overrides)
+            mismatch_info, remaining_jobs, skipped_jobs = _push_jobs(
+                session, remaining_jobs, bar, base_dir, pipelines, jobs_defs,
+                context_overrides, pushed_hashes
+            )
+        unchanged_jobs.extend(skipped_jobs)
         if mismatch_info:
             job_name, expected_type, pushed_type = mismatch_info
             if _confirm_mismatching_job_type_overwrite(job_name,
@@ -61,8 +86,10 @@ def push(context, jobs_names, base_dir, force, allow_overwrite,
                 )
             else:
                 break
-    pushed_jobs = sorted(set(jobs_names).difference(remaining_jobs))
+    pushed_jobs = sorted(set(jobs_names).difference(remaining_jobs)
+                         .difference(unchanged_jobs))
     utils.print_jobs_list('Jobs not pushed:', remaining_jobs, fg='yellow')
+    utils.print_jobs_list('Jobs already up to date:', sorted(unchanged_jobs))
     utils.print_jobs_list('Pushed jobs:', pushed_jobs, fg='green')
     if trigger_builds:
         build.do_build(session, jobs_names, base_dir, block_builds,
@@ -70,17 +97,13 @@ def push(context, jobs_names, base_dir, force, allow_overwrite,
 
 
 def _check_for_gui_modifications(context, session, base_dir, jobs_names,
-                                 allow_overwrite, context_overrides):
-    if allow_overwrite:
-        return
+                                 servers_hashes, context_overrides):
     gui_was_modified = False
     for job_name in jobs_names:
-        try:
-            conf = jenkins_api.get_job_config(session, job_name)
-        except exceptions.JobNotFound:
+        hashes = servers_hashes[job_name]
+        if hashes is None:
             continue
-        saved_hash, conf = jobs.extract_hash_from_description(conf)
-        actual_hash = jobs.get_conf_hash(conf)
+        saved_hash, actual_hash = hashes
         if saved_hash is not None and saved_hash != actual_hash:
             utils.sechowrap('It looks like job "%s" has been modified in the '
                             'Jenkins GUI:' % job_name, fg='red', bold=True)
@@ -96,19 +119,49 @@ def _check_for_gui_modifications(context, session, base_dir, jobs_names,
         context.exit(1)
 
 
+def _get_server_hashes(session, job_name):
+    """
+    Get the hashes of job *job_name* on the server.
+
+    Return a ``(saved_hash, actual_hash)`` tuple, where *saved_hash* is the
+    hash inserted by jenskipper in the job description when it was pushed (or
+    None), and *actual_hash* the hash of the job configuration on the server.
+    Return None if the job does not exist on the server.
+    """
+    try:
+        conf = jenkins_api.get_job_config(session, job_name)
+    except exceptions.JobNotFound:
+        return None
+    saved_hash, conf = jobs.extract_hash_from_description(conf)
+    actual_hash = jobs.get_conf_hash(conf)
+    return saved_hash, actual_hash
+
+
 def _push_jobs(session, jobs_names, progress_bar, base_dir, pipelines,
-               jobs_defs, context_overrides):
+               jobs_defs, context_overrides, pushed_hashes):
+    """
+    Push *jobs_names* to the server.
+
+    Jobs are rendered in the current thread and pushed by a pool of threads as
+    soon as they are rendered, so the rendering of a job overlaps with the
+    pushes of the previous jobs.
+
+    Jobs whose rendered hash is the same as in *pushed_hashes* (a dict of
+    hashes of the jobs on the server, indexed by job names) are not pushed.
+
+    Return a ``(mismatch_info, remaining_jobs, unchanged_jobs)`` tuple, where
+    *mismatch_info* is None or a ``(job_name, expected_type, pushed_type)``
+    tuple if a job could not be pushed because its type changed,
+    *remaining_jobs* the list of jobs that were not pushed, and
+    *unchanged_jobs* the list of jobs skipped because they were already up to
+    date.
+    """
     templates_dir = repository.get_templates_dir(base_dir)
-    remaining_jobs = list(jobs_names)
-    mismatch_info = None
-    for job_name in progress_bar:
-        job_def = jobs_defs[job_name]
-        pipe_info = pipelines.get(job_name)
-        final_conf, _ = jobs.render_job(templates_dir, job_def['template'],
-                                        job_def['context'], pipe_info,
-                                        insert_hash=True,
-                                        context_overrides=context_overrides)
-        if conf.get(base_dir, ['server', 'disable_jobs_from_gui']):
+    disable_jobs_from_gui = conf.get(base_dir,
+                                     ['server', 'disable_jobs_from_gui'])
+
+    def push_job(job_name, final_conf):
+        if disable_jobs_from_gui:
             try:
                 server_conf = jenkins_api.get_job_config(session, job_name)
                 final_conf = jobs.transfuse_disabled_flag(server_conf,
@@ -116,17 +169,63 @@ def _push_jobs(session, jobs_names, progress_bar, base_dir, pipelines,
             except exceptions.JobNotFound:
                 # Job does not exist on server, nothing to do
                 pass
-        try:
-            jenkins_api.push_job_config(
-                session,
-                job_name,
-                final_conf
+        jenkins_api.push_job_config(
+            session,
+            job_name,
+            final_conf
+        )
+
+    def collect_pushes(done):
+        mismatch_info = None
+        for future in done:
+            job_name = pending.pop(future)
+            try:
+                future.result()
+            except exceptions.JobTypeMismatch as exc:
+                if mismatch_info is None:
+                    mismatch_info = (job_name, exc.expected_type,
+                                     exc.pushed_type)
+            else:
+                pushed_jobs.add(job_name)
+                progress_bar.update(1)
+        return mismatch_info
+
+    pending = {}
+    pushed_jobs = set()
+    unchanged_jobs = []
+    mismatch_info = None
+    with futures.ThreadPoolExecutor(max_workers=PUSH_WORKERS) as executor:
+        for job_name in jobs_names:
+            job_def = jobs_defs[job_name]
+            pipe_info = pipelines.get(job_name)
+            final_conf, _ = jobs.render_job(
+                templates_dir, job_def['template'], job_def['context'],
+                pipe_info, insert_hash=True,
+                context_overrides=context_overrides
             )
-        except exceptions.JobTypeMismatch as exc:
-            mismatch_info = (job_name, exc.expected_type, exc.pushed_type)
-            break
-        remaining_jobs.pop(0)
-    return mismatch_info, remaining_jobs
+            if job_name in pushed_hashes:
+                local_hash, _ = jobs.extract_hash_from_description(final_conf)
+                if local_hash == pushed_hashes[job_name]:
+                    unchanged_jobs.append(job_name)
+                    pushed_jobs.add(job_name)
+                    progress_bar.update(1)
+                    continue
+            pending[executor.submit(push_job, job_name, final_conf)] = \
+                job_name
+            if len(pending) >= MAX_PENDING_PUSHES:
+                done, _ = futures.wait(pending,
+                                       return_when=futures.FIRST_COMPLETED)
+            else:
+                done = [f for f in pending if f.done()]
+            mismatch_info = collect_pushes(done)
+            if mismatch_info is not None:
+                break
+        done, _ = futures.wait(pending)
+        last_mismatch_info = collect_pushes(done)
+        if mismatch_info is None:
+            mismatch_info = last_mismatch_info
+    remaining_jobs = [n for n in jobs_names if n not in pushed_jobs]
+    return mismatch_info, remaining_jobs, unchanged_jobs
 
 
 def _confirm_mismatching_job_type_overwrite(job_name, expected_type,
@@ -6,6 +6,7 @@ from . import decorators
 from . import build
 from .. import jenkins_api
 from .. import repository
+from .. import utils
 
 
 TEMP_JOBS_INFIX = '.JK_TEST'
@@ -17,12 +18,14 @@ TEMP_JOBS_INFIX = '.JK_TEST'
 @decorators.jobs_command(dirty_flag=True)
 @decorators.context_command
 @decorators.handle_all_errors()
-def test(jobs_names, base_dir, context_overrides, build_parameters):
+@click.pass_context
+def test(context, jobs_names, base_dir, context_overrides, build_parameters):
     """
     Create temporary copies of JOBS and execute them.
 
     This command blocks until all jobs are done. Jobs that succeeded are
-    deleted, and failures are kept for inspection.
+    deleted, and failures are kept for inspection. If waiting is interrupted
+    with Ctrl-C, the jobs that are not done are kept too.
     """
     session = jenkins_api.auth(base_dir)
     new_jobs_names = _create_temp_jobs(session, jobs_names, base_dir,
@@ -31,9 +34,16 @@ def test(jobs_names, base_dir, context_overrides, build_parameters):
                                       new_jobs_names,
                                       base_dir,
                                       build_parameters)
-    results = build.wait_for_builds(session, queue_urls)
+    with build.stop_on_interrupt() as stop_event:
+        results = build.wait_for_builds(session, queue_urls, stop_event)
     _disable_jobs(session, base_dir, new_jobs_names)
+    unfinished_jobs = build.get_unfinished_jobs(queue_urls, results,
+                                                stop_event)
+    utils.print_jobs_list('Stopped waiting for (temporary jobs were kept):',
+                          unfinished_jobs, pad_lines=0, fg='yellow')
     _process_results(session, base_dir, results)
+    if unfinished_jobs:
+        context.exit(1)
 
 
 def _create_temp_jobs(session, jobs_names, base_dir, context_overrides):
@@ -1,5 +1,6 @@
 import os
 import os.path as op
+import functools
 
 import configobj
 import validate
@@ -47,7 +48,16 @@ def get_conf(base_dir):
     """
     Get the actual configuration, built by merging the repository conf into the
     global user conf.
+
+    Results are cached until one of the configuration files is modified, and
+    must not be modified by callers.
     """
+    fnames = (get_user_conf_fname(), repository.get_conf_fname(base_dir))
+    return _get_conf(base_dir, fnames, utils.get_files_stamp(fnames))
+
+
+@functools.lru_cache(maxsize=16)
+def _get_conf(base_dir, fnames, files_stamp):
     user_conf = get_user_conf()
     repos_conf = get_repository_conf(base_dir)
     configspec_fname = op.join(THIS_DIR, 'confspec.ini')
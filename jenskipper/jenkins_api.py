@@ -1,20 +1,35 @@
 import click
 import requests
+import requests.adapters
 import re
 import six
 from six.moves.urllib import parse as urlparse
+from urllib3.util.retry import Retry
 
 from . import conf
 from . import exceptions
 
 
+# Should be at least the number of threads used by utils.map_jobs()
+CONNECTIONS_POOL_SIZE = 16
+
+
 def auth(base_dir, jenkins_url=None):
     """
     Authenticate with the Jenkins server.
 
     Return a :class:`requests.Session` object with authentication baked in.
+    The session keeps a pool of connections to the server, and can be shared
+    by multiple threads.
     """
     session = requests.session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=CONNECTIONS_POOL_SIZE,
+        pool_maxsize=CONNECTIONS_POOL_SIZE,
+        max_retries=Retry(total=3, backoff_factor=0.3)
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
 
     # Retrieve user/password from conf
     if jenkins_url is None:
@@ -211,20 +226,68 @@ def get_build_log(session, build_url):
     return resp.text
 
 
-def get_object(session, path_or_url):
+def get_object(session, path_or_url, tree=None):
     """
     Get data from the ``api/json`` page of *path_or_url*.
 
     *path_or_url* can be a path relative to *session.jenkins_url* or a full
     jenkins URL.
+
+    *tree* can be used to only retrieve some fields, see the documentation of
+    the ``tree`` parameter in the Jenkins remote API.
     """
     parsed = urlparse.urlparse(path_or_url)
     url = urlparse.urljoin(session.jenkins_url, '%s/api/json' % parsed.path)
-    resp = session.get(url)
+    params = {'tree': tree} if tree is not None else None
+    resp = session.get(url, params=params)
     resp.raise_for_status()
     return resp.json()
 
 
+def get_queue_snapshot(session):
+    """
+    Get the items waiting in the builds queue, in a single request.
+
+    Return a dict indexed by queue item ids, containing the "_class", "why",
+    "blocked", "buildable" and "stuck" keys of each item.
+    """
+    tree = 'items[id,_class,why,blocked,buildable,stuck]'
+    data = get_object(session, '/queue', tree=tree)
+    return {i['id']: i for i in data.get('items', [])}
+
+
+def get_queue_item_id(queue_url):
+    """
+    Get the id of the queue item at *queue_url*, as returned by
+    :func:`build_job`, or None if *queue_url* is not a queue item URL.
+    """
+    match = re.search(r'/queue/item/(\d+)', queue_url)
+    if match is None:
+        return None
+    return int(match.group(1))
+
+
+def get_builds_snapshot(session, max_builds=10):
+    """
+    Get the state of the last *max_builds* builds of all top-level jobs, in a
+    single request.
+
+    The response covers every job of the server, so this is only worth it when
+    polling many builds. Builds of jobs in folders are not included.
+
+    Return a dict indexed by builds URL paths, containing dicts with the
+    "url", "result", "building" and (for multi configuration projects)
+    "runs" keys of each build.
+    """
+    tree = 'jobs[builds[url,result,building,runs[url]]{0,%s}]' % max_builds
+    data = get_object(session, '', tree=tree)
+    ret = {}
+    for job in data.get('jobs', []):
+        for build in job.get('builds') or []:
+            ret[urlparse.urlparse(build['url']).path] = build
+    return ret
+
+
 def toggle_job(session, job_name, enable):
     """
     Enable or disable a job.
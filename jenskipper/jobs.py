@@ -1,4 +1,5 @@
 from xml.etree import ElementTree
+import copy
 import hashlib
 import re
 
@@ -30,21 +31,42 @@ def extract_pipeline_conf(conf):
     Remove and parse the pipeline bits in XML job definition *conf*.
     """
     tree = utils.parse_xml(conf)
-    rbt_elt = tree.find('.//jenkins.triggers.ReverseBuildTrigger')
-    if rbt_elt is not None:
-        upstream_projects = rbt_elt.findtext('./upstreamProjects')
-        upstream_projects = [x for x in upstream_projects.split(',')
-                             if x.strip()]
-        upstream_link_type = rbt_elt.findtext('./threshold/name')
-        pipe_bits = (upstream_projects, upstream_link_type)
-        parent_map = {c: p for p in tree.iter() for c in p}
-        parent_map[rbt_elt].remove(rbt_elt)
-    else:
-        pipe_bits = None
+    pipe_bits = _extract_pipeline_bits(tree)
     pruned_conf = utils.render_xml(tree)
     return pipe_bits, pruned_conf
 
 
+def _extract_pipeline_bits(tree):
+    rbt_elt = _find_descendant(tree, 'jenkins.triggers.ReverseBuildTrigger')
+    if rbt_elt is None:
+        return None
+    upstream_projects = rbt_elt.findtext('./upstreamProjects')
+    upstream_projects = [x for x in upstream_projects.split(',')
+                         if x.strip()]
+    upstream_link_type = rbt_elt.findtext('./threshold/name')
+    _remove_elt(tree, rbt_elt)
+    return upstream_projects, upstream_link_type
+
+
+def _find_descendant(tree, tag):
+    """
+    Equivalent to ``tree.find('.//<tag>')``, without going through the
+    :mod:`xml.etree.ElementPath` machinery.
+    """
+    for elt in tree.iter(tag):
+        if elt is not tree:
+            return elt
+    return None
+
+
+def _remove_elt(tree, elt):
+    for parent in tree.iter():
+        for child in parent:
+            if child is elt:
+                parent.remove(elt)
+                return
+
+
 def merge_pipeline_conf(conf, parents, link_type):
     """
     Merge back pipeline informations in job configuration *conf*.
@@ -53,19 +75,29 @@ def merge_pipeline_conf(conf, parents, link_type):
     to them (one of "SUCCESS", "UNSTABLE" or "FAILURE").
     """
     tree = utils.parse_xml(conf)
+    _merge_pipeline_bits(tree, parents, link_type)
+    return utils.render_xml(tree)
+
+
+def _merge_pipeline_bits(tree, parents, link_type):
+    trigger = copy.deepcopy(_TRIGGER_ELTS[link_type])
+    upstream_projects = next(trigger.iter('upstreamProjects'))
+    upstream_projects.text = ', '.join(parents)
+    triggers = _find_descendant(tree, 'triggers')
+    triggers.append(trigger)
+
+
+def _create_trigger_elt(link_type):
     trigger = _create_elt('jenkins.triggers.ReverseBuildTrigger')
     trigger.append(_create_elt('spec'))
-    upstream_projects = _create_elt('upstreamProjects', ', '.join(parents))
-    trigger.append(upstream_projects)
+    trigger.append(_create_elt('upstreamProjects'))
     threshold = _create_elt('threshold')
     threshold.append(_create_elt('name', link_type))
     for elt_name, elt_text in LINK_ELTS[link_type]:
         elt = _create_elt(elt_name, elt_text)
         threshold.append(elt)
     trigger.append(threshold)
-    triggers = tree.find('.//triggers')
-    triggers.append(trigger)
-    return utils.render_xml(tree)
+    return trigger
 
 
 def _create_elt(tag, text=None):
@@ -74,6 +106,10 @@ def _create_elt(tag, text=None):
     return elt
 
 
+# Trigger elements for each link type, copied by _merge_pipeline_bits()
+_TRIGGER_ELTS = {t: _create_trigger_elt(t) for t in LINK_ELTS}
+
+
 def render_job(templates_dir, template, context, pipe_info, insert_hash=False,
                context_overrides={}):
     """
@@ -99,11 +135,14 @@ def render_job(templates_dir, template, context, pipe_info, insert_hash=False,
     rendered, files = templates.render(templates_dir, template, context,
                                        context_overrides=context_overrides)
     rendered = rendered.strip()
-    if pipe_info is not None:
-        parents, link_type = pipe_info
-        rendered = merge_pipeline_conf(rendered, parents, link_type)
-    if insert_hash:
-        rendered = append_hash_in_description(rendered)
+    if pipe_info is not None or insert_hash:
+        tree = utils.parse_xml(rendered)
+        if pipe_info is not None:
+            parents, link_type = pipe_info
+            _merge_pipeline_bits(tree, parents, link_type)
+        if insert_hash:
+            _append_hash_in_description(tree)
+        rendered = utils.render_xml(tree)
     return rendered, files
 
 
@@ -111,8 +150,11 @@ def get_conf_hash(conf):
     """
     Get a hash uniquely representing the XML job configuration *conf*.
     """
+    return _get_tree_hash(utils.parse_xml(conf))
+
+
+def _get_tree_hash(tree):
     hobj = hashlib.sha1()
-    tree = utils.parse_xml(conf)
     for element in tree.iter():
         hobj.update(element.tag.encode('utf8'))
         if element.text is not None:
@@ -128,13 +170,17 @@ def append_hash_in_description(conf):
     """
     Append the *conf* hash at the end of its description.
     """
-    conf_hash = get_conf_hash(conf)
     tree = utils.parse_xml(conf)
-    description_elt = tree.find('.//description')
+    _append_hash_in_description(tree)
+    return utils.render_xml(tree)
+
+
+def _append_hash_in_description(tree):
+    conf_hash = _get_tree_hash(tree)
+    description_elt = _find_descendant(tree, 'description')
     text = description_elt.text if description_elt.text is not None else ''
     text += '\r\n\r\n-*- jenskipper-hash: %s -*-' % conf_hash
     description_elt.text = text
-    return utils.render_xml(tree)
 
 
 def extract_hash_from_description(conf):
@@ -146,17 +192,24 @@ def extract_hash_from_description(conf):
     description.
     """
     tree = utils.parse_xml(conf)
-    description_elt = tree.find('.//description')
-    if description_elt is None:
+    description_elt = _find_descendant(tree, 'description')
+    if description_elt is None or description_elt.text is None:
         return None, conf
-    text = description_elt.text
-    if text is not None:
-        conf_hash, text = extract_hash_from_text(text)
-        description_elt.text = text
-        conf = utils.render_xml(tree)
-    else:
-        conf_hash = None
-    return conf_hash, conf
+    conf_hash = extract_hash_from_tree(tree)
+    return conf_hash, utils.render_xml(tree)
+
+
+def extract_hash_from_tree(tree):
+    """
+    Like :func:`extract_hash_from_description`, but operate in place on a
+    parsed XML *tree*, and only return the hash.
+    """
+    description_elt = _find_descendant(tree, 'description')
+    if description_elt is None or description_elt.text is None:
+        return None
+    conf_hash, description_elt.text = \
+        extract_hash_from_text(description_elt.text)
+    return conf_hash
 
 
 def extract_hash_from_text(text):
@@ -175,15 +228,22 @@ def remove_disabled_flag(conf):
     Remove the <disabled> tag from *conf* XML.
     """
     tree = utils.parse_xml(conf)
-    _do_remove_disabled_flag(tree)
+    remove_disabled_flag_from_tree(tree)
     return utils.render_xml(tree)
 
 
 def _get_disabled_elt(tree):
-    return tree.find('.//disabled')
+    return _find_descendant(tree, 'disabled')
+
 
+def remove_disabled_flag_from_tree(tree):
+    """
+    Like :func:`remove_disabled_flag`, but operate in place on a parsed XML
+    *tree*.
 
-def _do_remove_disabled_flag(tree):
+    Return the index of the removed tag in its parent, or -1 if there was no
+    <disabled> tag.
+    """
     disabled_elt = _get_disabled_elt(tree)
     if disabled_elt is not None:
         elt_index = list(tree).index(disabled_elt)
@@ -207,6 +267,6 @@ def transfuse_disabled_flag(from_conf, to_conf):
     to_tree = utils.parse_xml(to_conf)
     transfused_elt = _get_disabled_elt(from_tree)
     if transfused_elt is not None:
-        elt_index = _do_remove_disabled_flag(to_tree)
+        elt_index = remove_disabled_flag_from_tree(to_tree)
         to_tree.insert(elt_index, transfused_elt)
     return utils.render_xml(to_tree)
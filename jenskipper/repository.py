@@ -1,12 +1,20 @@
 import os
 import os.path as op
 import sys
+import functools
+import collections
 
 import yaml
 import click
 
 from . import pipelines
 from . import jobs
+from . import utils
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
 
 
 CONF_FNAME = '.jenskipper.conf'
@@ -57,7 +65,7 @@ def _get_extra_jobs_defs_fname(base_dir):
 
 
 def parse_jobs_defs(fp, default_contexts):
-    jobs_defs = yaml.safe_load(fp)
+    jobs_defs = yaml.load(fp, Loader=YamlLoader)
     return {k: _normalize_job_def(v, default_contexts)
             for k, v in jobs_defs.items()}
 
@@ -65,8 +73,11 @@ def parse_jobs_defs(fp, default_contexts):
 def _normalize_job_def(job_def, default_contexts):
     job_def_context = job_def.get('context', {})
     default_context_name = job_def.get('default_context', 'default')
-    context = default_contexts.get(default_context_name, {}).copy()
-    context.update(job_def_context)
+    # Jobs sharing a default context all point to the same dict instead of
+    # each holding a copy of it
+    context = collections.ChainMap(job_def_context,
+                                   default_contexts.get(default_context_name,
+                                                        {}))
     return {
         'template': job_def['template'],
         'default_context': default_context_name,
@@ -80,7 +91,18 @@ def get_jobs_defs(base_dir):
 
     Return a dict indexed by job name containing jobs properties (template,
     context, etc...).
+
+    Results are cached until one of the files they are loaded from is
+    modified, and must not be modified by callers.
     """
+    fnames = (get_default_contexts_fname(base_dir),
+              get_jobs_defs_fname(base_dir),
+              _get_extra_jobs_defs_fname(base_dir))
+    return _get_jobs_defs(base_dir, utils.get_files_stamp(fnames))
+
+
+@functools.lru_cache(maxsize=16)
+def _get_jobs_defs(base_dir, files_stamp):
     default_contexts = get_default_contexts(base_dir)
     jobs_fname = get_jobs_defs_fname(base_dir)
     with open(jobs_fname) as fp:
@@ -100,7 +122,7 @@ def get_default_contexts_fname(base_dir):
 
 
 def parse_default_contexts(fp):
-    contexts = yaml.safe_load(fp)
+    contexts = yaml.load(fp, Loader=YamlLoader)
     if contexts is None:
         contexts = {}
     return contexts
@@ -117,7 +139,18 @@ def get_pipelines_fname(base_dir):
 
 
 def get_pipelines(base_dir):
+    """
+    Get the pipelines for the repository in *base_dir*.
+
+    Results are cached until the pipelines file is modified, and must not be
+    modified by callers.
+    """
     fname = get_pipelines_fname(base_dir)
+    return _get_pipelines(fname, utils.get_files_stamp([fname]))
+
+
+@functools.lru_cache(maxsize=16)
+def _get_pipelines(fname, files_stamp):
     with open(fname) as fp:
         return pipelines.parse_pipelines(fp.read())
 
@@ -1,4 +1,9 @@
+import os
+import os.path as op
 import traceback
+import threading
+import functools
+import contextlib
 
 import jinja2
 import jinja2.nodes
@@ -49,14 +54,46 @@ def render(templates_dir, template, context, context_overrides={}):
         ``template_files`` is the set of files that were loaded to render the
         template
     """
-    loader = TrackingFileSystemLoader(templates_dir)
-    env = jinja2.Environment(loader=loader,
-                             autoescape=True,
-                             undefined=jinja2.StrictUndefined,
-                             extensions=[_RaiseExtension])
-    template = env.get_template(template)
-    context = utils.deep_merge(context, context_overrides)
-    return template.render(**context), loader.loaded_files
+    env = get_env(templates_dir)
+    with env.track_loaded_files() as loaded_files:
+        template = env.get_template(template)
+        if context_overrides:
+            context = utils.deep_merge(context, context_overrides)
+        rendered = template.render(**context)
+    return rendered, loaded_files
+
+
+@functools.lru_cache(maxsize=8)
+def get_env(templates_dir):
+    """
+    Get the :class:`TrackingEnvironment` used to render templates in
+    *templates_dir*.
+
+    Environments are cached, so templates are compiled only once per process.
+    Compiled templates are also cached on disk, see
+    :func:`get_bytecode_cache_dir`.
+    """
+    return TrackingEnvironment(loader=jinja2.FileSystemLoader(templates_dir),
+                               autoescape=True,
+                               undefined=jinja2.StrictUndefined,
+                               extensions=[_RaiseExtension],
+                               cache_size=-1,
+                               bytecode_cache=_get_bytecode_cache())
+
+
+def get_bytecode_cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME',
+                                op.expanduser(op.join('~', '.cache')))
+    return op.join(cache_home, 'jenskipper', 'jinja')
+
+
+def _get_bytecode_cache():
+    cache_dir = get_bytecode_cache_dir()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        return None
+    return jinja2.FileSystemBytecodeCache(cache_dir)
 
 
 def extract_jinja_error(exc_info, fnames_prefix=None):
@@ -104,20 +141,44 @@ def print_jinja_error(stack_lines, error, lines_prefix=''):
     click.secho(lines_prefix + error, fg='red', bold=True)
 
 
-class TrackingFileSystemLoader(jinja2.FileSystemLoader):
+class TrackingEnvironment(jinja2.Environment):
     """
-    A :class:`jinja2.FileSystemLoader` subclass that keeps track of the files
-    it loads.
+    A :class:`jinja2.Environment` subclass that keeps track of the template
+    files used in renders, including the templates taken from its cache.
 
-    :attr loaded_files: the set of loaded files
+    Tracking is done per thread, see :meth:`track_loaded_files`.
     """
 
     def __init__(self, *args, **kwargs):
-        super(TrackingFileSystemLoader, self).__init__(*args, **kwargs)
-        self.loaded_files = set()
-
-    def get_source(self, *args, **kwargs):
-        contents, filename, uptodate = \
-            super(TrackingFileSystemLoader, self).get_source(*args, **kwargs)
-        self.loaded_files.add(filename)
-        return contents, filename, uptodate
+        super(TrackingEnvironment, self).__init__(*args, **kwargs)
+        self._tracking = threading.local()
+
+    @contextlib.contextmanager
+    def track_loaded_files(self):
+        """
+        A context manager yielding the set of files loaded by the current
+        thread in its block.
+        """
+        loaded_files = set()
+        self._tracking.loaded_files = loaded_files
+        try:
+            yield loaded_files
+        finally:
+            self._tracking.loaded_files = None
+
+    def get_template(self, *args, **kwargs):
+        template = super(TrackingEnvironment, self).get_template(*args,
+                                                                 **kwargs)
+        self._track(template)
+        return template
+
+    def select_template(self, *args, **kwargs):
+        template = super(TrackingEnvironment, self).select_template(*args,
+                                                                    **kwargs)
+        self._track(template)
+        return template
+
+    def _track(self, template):
+        loaded_files = getattr(self._tracking, 'loaded_files', None)
+        if loaded_files is not None:
+            loaded_files.add(template.filename)
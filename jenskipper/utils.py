@@ -1,11 +1,15 @@
 import os
 import copy
+import collections
 import collections.abc
 import contextlib
+import io
+import itertools
 import re
+import threading
+from concurrent import futures
 
 import click
-import six
 from xml.etree import ElementTree
 
 
@@ -16,6 +20,16 @@ except ImportError:
     HAVE_LXML = False
 
 
+# Width of the text printed by sechowrap()
+_WRAP_WIDTH = 78
+
+_ENCODING_DECL_RE = re.compile(r'<\?.*xml.*encoding=.*\?>')
+
+# lxml parsers can't be used from multiple threads at the same time, so
+# clean_xml() uses one parser per thread
+_lxml_parsers = threading.local()
+
+
 def clean_xml(text):
     """
     Clean XML in *text*
@@ -25,10 +39,11 @@ def clean_xml(text):
     """
     text = text.strip()
     if HAVE_LXML:
-        parser = etree.XMLParser(remove_blank_text=True)
-        if isinstance(text, six.text_type):
-            # lxml wants bytes if there is an encoding declaration in the XML
-            if re.search(r'<\?.*xml.*encoding=.*\?>', text):
+        parser = _get_lxml_parser()
+        if isinstance(text, str):
+            # lxml wants bytes if there is an encoding declaration in the XML,
+            # which can only be at the start of the document
+            if _ENCODING_DECL_RE.search(text[:200]):
                 text = text.encode('utf8')
         tree = etree.fromstring(text, parser)
         return etree.tostring(tree, pretty_print=True, encoding='unicode')
@@ -36,17 +51,22 @@ def clean_xml(text):
         return text
 
 
+def _get_lxml_parser():
+    try:
+        return _lxml_parsers.parser
+    except AttributeError:
+        # The documents are only serialized back, so don't build their IDs
+        # lookup table
+        parser = etree.XMLParser(remove_blank_text=True, collect_ids=False)
+        _lxml_parsers.parser = parser
+        return parser
+
+
 def parse_xml(xml):
     '''
     Parse *xml* string with :mod:`xml.etree.ElementTree` and return the tree
     object.
-
-    This should be preferred to using :func:`xml.etree.ElementTree.fromstring`
-    directly, as it contains tricks to handle unicode data properly on Python 2
-    and 3.
     '''
-    if six.PY2 and isinstance(xml, six.text_type):
-        xml = xml.encode('utf8')
     return ElementTree.fromstring(xml)
 
 
@@ -54,28 +74,93 @@ def render_xml(tree):
     '''
     Render :mod:`xml.etree.ElementTree` *tree* to text.
     '''
-    encoding = 'unicode' if six.PY3 else None
-    return ElementTree.tostring(tree, encoding=encoding, method='xml')
+    return ElementTree.tostring(tree, encoding='unicode', method='xml')
 
 
 def unescape_xml(xml):
+    '''
+    Normalize *xml* the same way :func:`render_xml` does, by parsing and
+    rendering it back.
+
+    This does more than replacing entity references: attributes quoting,
+    empty elements and character references are all rewritten the way
+    :mod:`xml.etree.ElementTree` serializes them.
+    '''
     tree = parse_xml(xml)
     return render_xml(tree)
 
 
-def sechowrap(text, wrap_opts={}, **style):
-    text = click.wrap_text(text, **wrap_opts)
+def sechowrap(text, wrap_opts=None, **style):
+    if wrap_opts:
+        text = click.wrap_text(text, **wrap_opts)
+    elif not _is_wrapped_line(text):
+        text = click.wrap_text(text, width=_WRAP_WIDTH)
     click.secho(text, **style)
 
 
+def _is_wrapped_line(text):
+    # Return True if click.wrap_text() would return *text* unchanged when
+    # wrapping at _WRAP_WIDTH
+    return (len(text) <= _WRAP_WIDTH and text.isprintable() and
+            not text.endswith(' '))
+
+
 def print_jobs_list(label, jobs_names, pad_lines=1, empty_label=None, **style):
     if jobs_names:
-        click.secho('\n' * pad_lines, nl=False)
-        click.secho('%s\n  %s' % (label, '\n  '.join(jobs_names)), **style)
+        text = '%s\n  %s' % (label, '\n  '.join(jobs_names))
+        click.echo('\n' * pad_lines + click.style(text, **style))
     elif empty_label:
         click.secho(empty_label)
 
 
+def map_jobs(func, jobs_names, workers=16):
+    """
+    Call *func* on each job of *jobs_names* concurrently, in a pool of
+    *workers* threads.
+
+    Return a dict containing the results of *func*, indexed by job names. If
+    *func* raises an exception, the exception of the first failing job (in
+    *jobs_names* order) is re-raised.
+    """
+    return dict(iter_jobs(func, jobs_names, workers=workers))
+
+
+def iter_jobs(func, jobs_names, workers=16):
+    """
+    Like :func:`map_jobs`, but yield ``(job_name, result)`` tuples in
+    *jobs_names* order, as soon as each result is available.
+
+    The exception raised by *func* for a job is re-raised when reaching that
+    job, after the results of the previous jobs have been yielded.
+    """
+    jobs_names = list(jobs_names)
+    if not jobs_names:
+        return
+    workers = min(workers, len(jobs_names))
+    with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(func, jobs_names)
+        for item in zip(jobs_names, results):
+            yield item
+
+
+def get_files_stamp(fnames):
+    """
+    Return a hashable value that changes when one of the files in *fnames* is
+    modified, created or deleted.
+
+    Useful to invalidate cached data loaded from these files.
+    """
+    stamp = []
+    for fname in fnames:
+        try:
+            stat = os.stat(fname)
+        except OSError:
+            stamp.append(None)
+        else:
+            stamp.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
 def _get_hostport(parsed_url):
     hostport = parsed_url.hostname
     if parsed_url.port is not None:
@@ -96,14 +181,17 @@ def set_path_in_dict(dct, path, value, inplace=False):
     if inplace:
         cur = ret = dct
     else:
-        cur = ret = copy.deepcopy(dct)
-    keys = list(path)
-    while keys:
-        cur_key = keys.pop(0)
-        if keys:
-            cur = cur.setdefault(cur_key, {})
-        else:
-            cur[cur_key] = value
+        cur = ret = _fast_clone(dct)
+    path = tuple(path)
+    if path:
+        for key in path[:-1]:
+            nxt = cur.get(key)
+            if nxt is None:
+                # Get the value back: ConfigObj wraps dicts in sections
+                cur[key] = {}
+                nxt = cur[key]
+            cur = nxt
+        cur[path[-1]] = value
     return ret
 
 
@@ -112,18 +200,56 @@ def deep_merge(dct_a, dct_b, inplace=False):
     Perform a "deep merge" of *dct_b* into *dct_a*.
 
     Return the merged result, in a new dict if *inplace* is false, or else in
-    *dct_a*.
+    *dct_a*. Use *inplace* when the caller owns *dct_a* and does not need it
+    anymore, to avoid copying it. Values from *dct_b* that are not mappings
+    are shared with the result.
     """
     if inplace:
         ret = dct_a
     else:
-        ret = copy.deepcopy(dct_a)
-    flat_b = flatten_dict(dct_b)
-    for path, value in flat_b.items():
-        set_path_in_dict(ret, path, value, inplace=True)
+        ret = _fast_clone(dct_a)
+    _deep_merge_inplace(ret, dct_b)
     return ret
 
 
+def _deep_merge_inplace(dct_a, dct_b):
+    for key, value in dct_b.items():
+        if isinstance(value, collections.abc.Mapping):
+            sub_dct = dct_a.get(key)
+            if isinstance(sub_dct, collections.abc.MutableMapping):
+                _deep_merge_inplace(sub_dct, value)
+            else:
+                # Empty mappings in dct_b (even nested) leave dct_a untouched
+                sub_dct = {}
+                _deep_merge_inplace(sub_dct, value)
+                if sub_dct:
+                    dct_a[key] = sub_dct
+        else:
+            dct_a[key] = value
+
+
+_ATOMIC_TYPES = frozenset([str, bytes, int, float, bool, type(None)])
+
+
+def _fast_clone(obj):
+    """
+    A faster :func:`copy.deepcopy` for the dicts, lists and scalars
+    structures loaded from YAML files.
+
+    Chain maps are flattened to dicts. Objects of other types are copied with
+    :func:`copy.deepcopy`.
+    """
+    obj_type = type(obj)
+    if obj_type in _ATOMIC_TYPES:
+        return obj
+    elif obj_type is dict or obj_type is collections.ChainMap:
+        return {k: _fast_clone(v) for k, v in obj.items()}
+    elif obj_type is list:
+        return [_fast_clone(v) for v in obj]
+    else:
+        return copy.deepcopy(obj)
+
+
 def flatten_dict(dct):
     """
     Flatten keys of (possibly nested) *dct*.
@@ -172,18 +298,18 @@ def format_lxml_syntax_error(exc, context_lines=5, full_xml=False):
     *context_lines* is the number of lines to show around the error. If
     *full_xml* is true, show the entire XML.
     """
-    lines = exc.full_xml.splitlines()
     err_line = exc.lineno - 1
     err_offset = exc.offset - 1
     if full_xml:
         start_line = 0
         end_line = None
     else:
-        start_line = err_line - context_lines
+        start_line = max(err_line - context_lines, 0)
         end_line = err_line + context_lines
-    before_context = lines[start_line:err_line]
-    error_line = lines[err_line]
-    after_context = lines[err_line + 1:end_line]
+    # Only split the lines we are going to show
+    xml_lines = itertools.islice(io.StringIO(exc.full_xml, newline=None),
+                                 start_line, end_line)
+    xml_lines = [line.rstrip('\n') for line in xml_lines]
     lines = [
         'XML syntax error in %s:' % click.style(exc.context, bold=True),
         '',
@@ -191,44 +317,44 @@ def format_lxml_syntax_error(exc, context_lines=5, full_xml=False):
         '',
     ]
 
-    # Get the error context lines
-    xml_lines = []
-    xml_lines += before_context
-    xml_lines.append(
-        click.style(error_line[:err_offset], fg='red') +
-        click.style(error_line[err_offset], fg='red', bold=True) +
-        click.style(error_line[err_offset + 1:], fg='red')
-    )
-    xml_lines_error_index = len(xml_lines)
-    xml_lines += after_context
-
-    # Add line numbers gutter
-    gutter_width = len('%s' % (len(xml_lines) + start_line + 1))
-    gutter_fmt = '%%%si' % gutter_width
+    # Add the error context lines, with a line numbers gutter and a marker
+    # under the error. The styled gutter and the marker are the same for all
+    # lines, so they are built once.
+    gutter_width = len('%s' % (start_line + len(xml_lines)))
     margin_width = 2
-    xml_lines = [
-        click.style(gutter_fmt % (i + start_line + 1),
-                    fg='black', bold=True) +
-        ' ' * margin_width + l
-        for i, l in enumerate(xml_lines)
-    ]
-
-    # Add error marker
-    xml_lines.insert(xml_lines_error_index,
-                     ' ' * (err_offset + margin_width + gutter_width) + '^')
+    line_fmt = (click.style('%%%si' % gutter_width, fg='black', bold=True) +
+                ' ' * margin_width + '%s')
+    marker = ' ' * (err_offset + margin_width + gutter_width) + '^'
+    for lineno, line in enumerate(xml_lines, start_line + 1):
+        if lineno == exc.lineno:
+            line = (
+                click.style(line[:err_offset], fg='red') +
+                click.style(line[err_offset:err_offset + 1], fg='red',
+                            bold=True) +
+                click.style(line[err_offset + 1:], fg='red')
+            )
+        lines.append(line_fmt % (lineno, line))
+        if lineno == exc.lineno:
+            lines.append(marker)
 
-    lines += xml_lines
     return '\n'.join(lines)
 
 
 def _flatten_dict(dct, ancestors=()):
+    # Walk the dicts depth first with an explicit stack of items iterators,
+    # to keep keys order without recursing
     items = []
-    for key, value in dct.items():
-        path = ancestors + (key,)
-        if isinstance(value, collections.abc.Mapping):
-            items.extend(_flatten_dict(value, path))
-        else:
+    stack = [(ancestors, iter(dct.items()))]
+    while stack:
+        ancestors, dct_items = stack[-1]
+        for key, value in dct_items:
+            path = ancestors + (key,)
+            if isinstance(value, collections.abc.Mapping):
+                stack.append((path, iter(value.items())))
+                break
             items.append((path, value))
+        else:
+            stack.pop()
     return items
 
 
@@ -239,13 +365,17 @@ class cd(object):
     If *path* is ``None``, don't do anything.
     """
 
+    __slots__ = ('path', 'prev_cwd')
+
     def __init__(self, path):
-        self.path = path
+        self.path = path if path is None else os.fspath(path)
+        self.prev_cwd = None
 
     def __enter__(self):
         if self.path is not None:
             self.prev_cwd = os.getcwd()
-            os.chdir(self.path)
+            if self.path != self.prev_cwd:
+                os.chdir(self.path)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.path is not None:
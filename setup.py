@@ -30,6 +30,7 @@ setup(
         'jinja2',
         'configobj',
         'coloredlogs',
+        'six',
     ],
     extras_require={
         'dev': [
@@ -1,4 +1,8 @@
+import os
+import threading
+
 from jenskipper.cli import build
+from jenskipper import jenkins_api
 
 
 def test_build(requests_mock):
@@ -26,3 +30,167 @@ def test_build_block(requests_mock):
     requests_mock.get(build_url + '/api/json', json={'result': 'SUCCESS'})
     ret = build.build(['default_job', '--block'], standalone_mode=False)
     assert ret == 0
+
+
+def test_build_block_queue_item_not_found(requests_mock, capsys):
+    requests_mock.get('/api/json', json={'useCrumbs': False})
+    queue_path = '/queue/default_job'
+    requests_mock.post(
+        '/job/default_job/build',
+        status_code=201,
+        headers={'location': queue_path}
+    )
+    requests_mock.get(queue_path + '/api/json', status_code=404)
+    ret = build.build(['default_job', '--block'], standalone_mode=False)
+    assert ret == 0
+    out = capsys.readouterr().out
+    assert 'default_job: unknown status' in out
+    assert 'Stopped waiting for' not in out
+
+
+def test_poller(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(build.time, 'time', lambda: now[0])
+    poller = build.Poller(['a', 'b'], min_interval=1, max_interval=3,
+                          factor=2, jitter=0)
+    assert sorted(poller.get_due_jobs()) == ['a', 'b']
+    poller.reschedule('a', 'waiting')
+    poller.remove('b')
+    assert poller.get_due_jobs() == []
+    now[0] += 1
+    assert poller.get_due_jobs() == ['a']
+    poller.reschedule('a', 'waiting')
+    now[0] += 1
+    assert poller.get_due_jobs() == []
+    now[0] += 1
+    assert poller.get_due_jobs() == ['a']
+    poller.reschedule('a', 'building')
+    now[0] += 1
+    assert poller.get_due_jobs() == ['a']
+    poller.remove('a')
+    assert not poller
+
+
+def test_wait_for_builds_quiet_period(requests_mock, monkeypatch):
+    now = [100.0]
+    sleeps = []
+
+    def sleep(delay):
+        sleeps.append(round(delay, 3))
+        now[0] += delay
+
+    monkeypatch.setattr(build.time, 'time', lambda: now[0])
+    monkeypatch.setattr(build.time, 'sleep', sleep)
+    monkeypatch.setattr(build.random, 'uniform', lambda a, b: 0)
+    requests_mock.get('/api/json', json={'useCrumbs': False})
+    waiting_item = {'_class': 'hudson.model.Queue$WaitingItem',
+                    'blocked': False, 'buildable': False, 'stuck': False}
+    requests_mock.get('/queue/item/1/api/json', [
+        {'json': dict(waiting_item, why='Expires in 4.9 sec')},
+        {'json': dict(waiting_item, why='Expires in 4.8 sec')},
+        {'json': dict(waiting_item, why='Expires in 4.7 sec')},
+        {'json': {'executable': {'url': 'http://jenkins/job/a/1'}}},
+    ])
+    requests_mock.get('/job/a/1/api/json', json={'result': 'SUCCESS'})
+    session = jenkins_api.auth(os.environ['JK_DIR'])
+    results = build.wait_for_builds(session,
+                                    {'a': 'http://jenkins/queue/item/1'})
+    assert results == {'a': ('http://jenkins/job/a/1', 'SUCCESS', [])}
+    # The interval keeps growing while the "why" text changes
+    assert sleeps == [0.1, 0.15, 0.225]
+
+
+def test_wait_for_builds_snapshots(requests_mock, monkeypatch):
+    monkeypatch.setattr(build, 'BUILDS_SNAPSHOT_MIN_JOBS', 2)
+    requests_mock.get('/api/json', [
+        {'json': {'useCrumbs': False}},
+        {'json': {'jobs': [
+            {'builds': [{'url': 'http://jenkins/job/a/1', 'result': None}]},
+            {'builds': [{'url': 'http://jenkins/job/b/1', 'result': None}]},
+        ]}},
+        {'json': {'jobs': [
+            {'builds': [{'url': 'http://jenkins/job/a/1',
+                         'result': 'SUCCESS'}]},
+            {'builds': [{'url': 'http://jenkins/job/b/2',
+                         'result': 'FAILURE'}]},
+        ]}},
+    ])
+    requests_mock.get('/queue/api/json', [
+        {'json': {'items': [{'id': 1, 'why': 'busy'},
+                            {'id': 2, 'why': 'busy'}]}},
+        {'json': {'items': [{'id': 2, 'why': 'busy'}]}},
+    ])
+    requests_mock.get('/queue/item/1/api/json',
+                      json={'executable': {'url': 'http://jenkins/job/a/1'}})
+    requests_mock.get('/queue/item/2/api/json',
+                      json={'executable': {'url': 'http://jenkins/job/b/1'}})
+    requests_mock.get('/job/b/1/api/json', json={'result': 'UNSTABLE'})
+    session = jenkins_api.auth(os.environ['JK_DIR'])
+    queue_urls = {
+        'a': 'http://jenkins/queue/item/1',
+        'b': 'http://jenkins/queue/item/2',
+    }
+    results = build.wait_for_builds(session, queue_urls)
+    assert queue_urls == {
+        'a': 'http://jenkins/queue/item/1',
+        'b': 'http://jenkins/queue/item/2',
+    }
+    assert results == {
+        'a': ('http://jenkins/job/a/1', 'SUCCESS', []),
+        'b': ('http://jenkins/job/b/1', 'UNSTABLE', []),
+    }
+
+
+def test_wait_for_builds_stop_event(requests_mock):
+    requests_mock.get('/api/json', json={'useCrumbs': False})
+    queue_mock = requests_mock.get('/queue/item/1/api/json',
+                                   json={'why': 'busy'})
+    session = jenkins_api.auth(os.environ['JK_DIR'])
+    stop_event = threading.Event()
+    stop_event.set()
+    results = build.wait_for_builds(session,
+                                    {'a': 'http://jenkins/queue/item/1'},
+                                    stop_event)
+    assert results == {}
+    assert queue_mock.call_count == 1
+
+
+def test_wait_for_builds_no_builds_snapshot(requests_mock):
+    root_mock = requests_mock.get('/api/json', json={'useCrumbs': False})
+    requests_mock.get('/queue/api/json', json={'items': []})
+    for i, job_name in enumerate(['a', 'b'], 1):
+        requests_mock.get('/queue/item/%s/api/json' % i, json={
+            'executable': {'url': 'http://jenkins/job/%s/1' % job_name},
+        })
+        requests_mock.get('/job/%s/1/api/json' % job_name,
+                          json={'result': 'SUCCESS'})
+    session = jenkins_api.auth(os.environ['JK_DIR'])
+    results = build.wait_for_builds(session, {
+        'a': 'http://jenkins/queue/item/1',
+        'b': 'http://jenkins/queue/item/2',
+    })
+    assert results == {
+        'a': ('http://jenkins/job/a/1', 'SUCCESS', []),
+        'b': ('http://jenkins/job/b/1', 'SUCCESS', []),
+    }
+    # Only the authentication request hits the root API
+    assert root_mock.call_count == 1
+
+
+def test_wait_for_builds_stop_event_skips_builds(requests_mock):
+    requests_mock.get('/api/json', json={'useCrumbs': False})
+    requests_mock.get('/queue/item/1/api/json',
+                      json={'executable': {'url': 'http://jenkins/job/a/1'}})
+    requests_mock.get('/queue/item/2/api/json', json={'why': 'busy'})
+    requests_mock.get('/queue/api/json', json={'items': []})
+    build_mock = requests_mock.get('/job/a/1/api/json',
+                                   json={'result': 'SUCCESS'})
+    session = jenkins_api.auth(os.environ['JK_DIR'])
+    stop_event = threading.Event()
+    stop_event.set()
+    results = build.wait_for_builds(session, {
+        'a': 'http://jenkins/queue/item/1',
+        'b': 'http://jenkins/queue/item/2',
+    }, stop_event)
+    assert results == {}
+    assert build_mock.call_count == 0
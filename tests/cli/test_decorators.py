@@ -7,6 +7,9 @@ from jenskipper import exceptions
 def test_parse_context_vars():
     assert decorators.parse_context_vars(['foo.bar=1', 'baz=2']) == \
         {'foo': {'bar': '1'}, 'baz': '2'}
+    assert decorators.parse_context_vars(['a.b.c=1', 'a.b.d=2', 'a.e=3=4',
+                                          'a.b.c=5']) == \
+        {'a': {'b': {'c': '5', 'd': '2'}, 'e': '3=4'}}
     with pytest.raises(exceptions.MalformedContextVar) as excinfo:
         decorators.parse_context_vars(['foo'])
     assert str(excinfo.value) == 'foo'
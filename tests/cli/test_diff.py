@@ -45,3 +45,26 @@ def test_diff_with_context_overrides(requests_mock):
     requests_mock.get('/job/default_job/config.xml', text='<xml>job</xml>')
     assert diff.diff(['default_job', '--context', 'name=joob'],
                      standalone_mode=False) == 3
+
+
+def test_diff_output(requests_mock):
+    requests_mock.get('/api/json', json={'useCrumbs': False})
+    requests_mock.get('/job/default_job/config.xml', text='<xml>joob</xml>')
+    runner = CliRunner()
+    result = runner.invoke(diff.diff, ['default_job'])
+    assert result.exit_code == 3
+    lines = result.output.splitlines()
+    assert lines[:2] == ['--- remote/default_job.xml',
+                         '+++ local/default_job.xml']
+    assert '-<xml>joob</xml>' in lines
+
+
+def test_diff_output_before_error(requests_mock):
+    requests_mock.get('/api/json', json={'useCrumbs': False})
+    requests_mock.get('/job/default_job/config.xml', text='<xml>joob</xml>')
+    requests_mock.get('/job/missing_template/config.xml',
+                      text='<xml>joob</xml>')
+    runner = CliRunner()
+    result = runner.invoke(diff.diff, ['default_job', 'missing_template'])
+    assert result.exit_code == 1
+    assert '--- remote/default_job.xml' in result.output
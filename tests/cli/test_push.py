@@ -1,9 +1,12 @@
+import os
 import os.path as op
 
 from click.testing import CliRunner
 import pytest
 
 from jenskipper.cli import push
+from jenskipper import jobs
+from jenskipper import repository
 
 
 HERE = op.dirname(__file__)
@@ -62,6 +65,24 @@ def test_push_job_modified_in_gui(requests_mock):
     assert push.push(['default_job'], standalone_mode=False) == 1
 
 
+def test_push_unchanged_job(requests_mock):
+    job_config = repository.get_job_conf(os.environ['JK_DIR'],
+                                         'default_job')[0]
+    server_xml = jobs.append_hash_in_description(job_config)
+    requests_mock.get('/api/json', json={'useCrumbs': False})
+    requests_mock.get('/job/default_job/config.xml', text=server_xml)
+    post_mock = requests_mock.post('/job/default_job/config.xml')
+    runner = CliRunner()
+    result = runner.invoke(push.push, ['default_job'])
+    assert result.exit_code == 0
+    assert 'Jobs already up to date:\n  default_job' in result.output
+    assert not post_mock.called
+    result = runner.invoke(push.push, ['default_job', '--no-skip-unchanged'])
+    assert result.exit_code == 0
+    assert 'Pushed jobs:\n  default_job' in result.output
+    assert post_mock.called
+
+
 @pytest.mark.parametrize('setup_cli_env_vars', [op.join(HERE, 'tmp')],
                          indirect=True)
 def test_push_new_job_with_disable_jobs_from_gui(requests_mock, data_dir,
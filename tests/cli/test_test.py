@@ -1,5 +1,7 @@
 import re
+import threading
 
+from jenskipper.cli import build
 from jenskipper.cli import test
 
 
@@ -21,3 +23,54 @@ def test_test(requests_mock):
     requests_mock.post(re.compile('/job/%s/doDelete' % name_pattern))
     exit_code = test.test(['default_job'], standalone_mode=False)
     assert exit_code is None
+
+
+def test_test_queue_item_not_found(requests_mock, capsys):
+    requests_mock.get('/api/json', json={'useCrumbs': False})
+    name_pattern = r'default_job%s\.[0-9a-f]{8}' % test.TEMP_JOBS_INFIX
+    requests_mock.post(re.compile('/job/%s/config.xml' % name_pattern))
+    queue_path = '/queue/default_job'
+    requests_mock.post(
+        re.compile('/job/%s/build' % name_pattern),
+        status_code=201,
+        headers={'location': queue_path}
+    )
+    requests_mock.get(queue_path + '/api/json', status_code=404)
+    requests_mock.post(re.compile('/job/%s/disable' % name_pattern))
+    exit_code = test.test(['default_job'], standalone_mode=False)
+    assert exit_code is None
+    assert 'Stopped waiting for' not in capsys.readouterr().out
+
+
+def test_test_interrupted(requests_mock, monkeypatch, capsys):
+    requests_mock.get('/api/json', json={'useCrumbs': False})
+    name_pattern = r'default_job%s\.[0-9a-f]{8}' % test.TEMP_JOBS_INFIX
+    requests_mock.post(re.compile('/job/%s/config.xml' % name_pattern))
+    queue_path = '/queue/default_job'
+    requests_mock.post(
+        re.compile('/job/%s/build' % name_pattern),
+        status_code=201,
+        headers={'location': queue_path}
+    )
+    requests_mock.get(queue_path + '/api/json', json={'why': 'busy'})
+    disable_mock = requests_mock.post(
+        re.compile('/job/%s/disable' % name_pattern)
+    )
+    stop_event = threading.Event()
+    stop_event.set()
+
+    class FakeStopOnInterrupt(object):
+
+        def __enter__(self):
+            return stop_event
+
+        def __exit__(self, *args):
+            pass
+
+    monkeypatch.setattr(build, 'stop_on_interrupt', FakeStopOnInterrupt)
+    exit_code = test.test(['default_job'], standalone_mode=False)
+    assert exit_code == 1
+    assert disable_mock.call_count == 1
+    out = capsys.readouterr().out
+    assert 'Stopped waiting for (temporary jobs were kept):' in out
+    assert re.search(r'^  %s$' % name_pattern, out, re.M)
@@ -36,6 +36,20 @@ def setup_global_cli_env_vars():
     _setup_cli_env_vars(param)
 
 
+@pytest.fixture(scope='session', autouse=True)
+def setup_cache_dir(tmp_path_factory):
+    """
+    Keep the templates bytecode cache out of the user's cache directory.
+    """
+    prev_value = os.environ.get('XDG_CACHE_HOME')
+    os.environ['XDG_CACHE_HOME'] = str(tmp_path_factory.mktemp('cache'))
+    yield
+    if prev_value is None:
+        del os.environ['XDG_CACHE_HOME']
+    else:
+        os.environ['XDG_CACHE_HOME'] = prev_value
+
+
 @pytest.fixture
 def setup_cli_env_vars(request):
     prev_vars = _setup_cli_env_vars(request.param)
@@ -1,3 +1,5 @@
+import io
+
 from jenskipper import repository
 
 
@@ -7,3 +9,27 @@ def test_get_current_repository(data_dir):
     assert repository.search_base_dir(str(from_dir), data_dir) == base_dir
     assert repository.search_base_dir(str(base_dir), data_dir) == base_dir
     assert repository.search_base_dir(str(data_dir), data_dir) is None
+
+
+def test_get_pipelines_cache(tmp_dir):
+    fname = tmp_dir.join('pipelines.txt')
+    fname.write('a > b\n')
+    assert repository.get_pipelines(str(tmp_dir)) == \
+        {'b': (['a'], 'SUCCESS')}
+    fname.write('a ~> c\n')
+    assert repository.get_pipelines(str(tmp_dir)) == \
+        {'c': (['a'], 'FAILURE')}
+
+
+def test_parse_jobs_defs_contexts():
+    default_contexts = {'default': {'a': 1, 'b': 2}}
+    fp = io.StringIO(u'job1:\n'
+                     u'  template: job.xml\n'
+                     u'  context:\n'
+                     u'    b: 3\n'
+                     u'job2:\n'
+                     u'  template: job.xml\n')
+    jobs_defs = repository.parse_jobs_defs(fp, default_contexts)
+    assert jobs_defs['job1']['context'] == {'a': 1, 'b': 3}
+    assert jobs_defs['job2']['context'] == {'a': 1, 'b': 2}
+    assert default_contexts == {'default': {'a': 1, 'b': 2}}
@@ -75,6 +75,17 @@ def test_track_includes(data_dir):
     }
 
 
+def test_track_includes_from_cache(data_dir):
+    for _ in range(2):
+        _, loaded_files = templates.render(six.text_type(data_dir),
+                                           'template_with_include.txt',
+                                           {'name': 'Jane'})
+        assert loaded_files == {
+            data_dir.join('template_with_include.txt'),
+            data_dir.join('template.txt')
+        }
+
+
 def test_template_with_raise(data_dir):
     tpl_name = 'template_with_raise.txt'
     try:
@@ -1,3 +1,8 @@
+import os
+import collections
+import types
+
+import click
 import pytest
 
 from jenskipper import utils
@@ -17,3 +22,97 @@ def test_deep_merge():
         {'a': {'b': 'c'}},
         {'a': {'b': 'C', 'D': 'E'}, 'F': 'G'}
     ) == {'a': {'b': 'C', 'D': 'E'}, 'F': 'G'}
+    overrides = {'a': {'b': {'c': 'd'}}}
+    merged = utils.deep_merge({'a': {'b': 'c', 'e': 'f'}}, overrides)
+    assert merged == {'a': {'b': {'c': 'd'}, 'e': 'f'}}
+    assert merged['a']['b'] is not overrides['a']['b']
+    assert utils.deep_merge({'a': 'b', 'c': {'d': 'e'}},
+                            {'a': {}, 'c': {}, 'f': {'g': {}}}) == \
+        {'a': 'b', 'c': {'d': 'e'}}
+    dct = {'a': {'b': 'c'}}
+    assert utils.deep_merge(dct, {'a': {'d': 'e'}}, inplace=True) is dct
+    assert dct == {'a': {'b': 'c', 'd': 'e'}}
+
+
+def test_deep_merge_copies():
+    defaults = {'a': {'b': ['c']}, 'd': 'e'}
+    merged = utils.deep_merge(collections.ChainMap({'d': 'E'}, defaults),
+                              {'a': {'f': 'g'}})
+    assert merged == {'a': {'b': ['c'], 'f': 'g'}, 'd': 'E'}
+    assert type(merged) is dict
+    merged['a']['b'].append('h')
+    assert defaults == {'a': {'b': ['c']}, 'd': 'e'}
+
+
+def test_flatten_dict():
+    assert list(utils.flatten_dict({
+        'a': {'b': 1, 'c': {'d': 2}, 'e': 3},
+        'f': 4,
+        'g': {},
+    }).items()) == [(('a', 'b'), 1), (('a', 'c', 'd'), 2), (('a', 'e'), 3),
+                    (('f',), 4)]
+
+
+def test_map_jobs():
+    assert utils.map_jobs(len, ['a', 'bb', 'ccc']) == \
+        {'a': 1, 'bb': 2, 'ccc': 3}
+    assert utils.map_jobs(len, []) == {}
+
+    def raise_on_b(name):
+        if name.startswith('b'):
+            raise ValueError(name)
+
+    with pytest.raises(ValueError) as excinfo:
+        utils.map_jobs(raise_on_b, ['a', 'b1', 'b2'])
+    assert str(excinfo.value) == 'b1'
+
+
+def test_format_lxml_syntax_error():
+    exc = types.SimpleNamespace(full_xml='<a>\n<b>\n<c>\n</a>', lineno=2,
+                                offset=2, context='job', message='error')
+    text = click.unstyle(utils.format_lxml_syntax_error(exc, context_lines=1))
+    assert text.splitlines() == [
+        'XML syntax error in job:',
+        '',
+        'error',
+        '',
+        '1  <a>',
+        '2  <b>',
+        '    ^',
+    ]
+
+
+def test_cd(tmp_dir):
+    cwd = os.getcwd()
+    with utils.cd(tmp_dir):
+        assert os.getcwd() == str(tmp_dir)
+        with utils.cd(str(tmp_dir)):
+            assert os.getcwd() == str(tmp_dir)
+            os.chdir(cwd)
+        assert os.getcwd() == str(tmp_dir)
+        with utils.cd(None):
+            assert os.getcwd() == str(tmp_dir)
+    assert os.getcwd() == cwd
+
+
+def test_sechowrap(capsys):
+    for text in ['', 'short message', 'a  b\tc ', 'word ' * 20]:
+        utils.sechowrap(text)
+        assert capsys.readouterr().out == \
+            click.wrap_text(text, width=78) + '\n'
+    utils.sechowrap('word ' * 4, {'width': 10})
+    assert capsys.readouterr().out == 'word word\nword word\n'
+
+
+def test_iter_jobs():
+    results = []
+
+    def raise_on_b(name):
+        if name == 'b':
+            raise ValueError(name)
+        return name.upper()
+
+    with pytest.raises(ValueError):
+        for item in utils.iter_jobs(raise_on_b, ['a', 'b', 'c']):
+            results.append(item)
+    assert results == [('a', 'A')]